@@ -7,8 +7,10 @@ Compare official docs patterns vs. community/production patterns.
 Run this file to see signatures in action.
 """
 
+import sys
+
 import dspy
-from typing import Literal, Optional
+from typing import Literal, TypeAlias
 
 # =============================================================================
 # SETUP: Configure DSPy with an LM
@@ -18,16 +20,11 @@ from typing import Literal, Optional
 # lm = dspy.LM("openai/gpt-4o-mini", api_key="your-key")
 # For this example, we'll show the pattern without requiring API keys
 
-print("=" * 80)
-print("DSPy Signatures: Annotated Examples")
-print("=" * 80)
 
 # =============================================================================
 # EXAMPLE 1: Official Docs Pattern (Minimal)
 # =============================================================================
 
-print("\n[EXAMPLE 1] Official Docs Pattern: Minimal Signature\n")
-
 
 class BasicQA(dspy.Signature):
     """Answer questions with short factoid answers."""
@@ -47,19 +44,11 @@ class BasicQA(dspy.Signature):
 # result = predictor(question="What is DSPy?")
 # print(result.answer)
 
-print("BasicQA Signature:")
-print(f"  Docstring: {BasicQA.__doc__}")
-print(f"  Input fields: question")
-print(f"  Output fields: answer")
-print(f"  Type hints: None (implied str)")
-print("\n✅ Official docs use this for simplicity and teaching")
 
 # =============================================================================
 # EXAMPLE 2: Community Pattern (Descriptive)
 # =============================================================================
 
-print("\n[EXAMPLE 2] Community Pattern: With Descriptions\n")
-
 
 class DescriptiveQA(dspy.Signature):
     """Answer questions using provided context.
@@ -87,18 +76,17 @@ class DescriptiveQA(dspy.Signature):
 # - Include multiple inputs when needed
 # - Specify output format in description
 
-print("DescriptiveQA Signature:")
-print(f"  Docstring: Multi-line with constraints")
-print(f"  Input fields: question, context (both with descriptions)")
-print(f"  Output fields: answer (with format guidance)")
-print(f"  Type hints: str (explicit)")
-print("\n⚡ Community projects use this for better LM guidance")
 
 # =============================================================================
 # EXAMPLE 3: Production Pattern (Validated & Robust)
 # =============================================================================
 
-print("\n[EXAMPLE 3] Production Pattern: Full Validation\n")
+# Categorical types reused across several signatures below.
+# Define each Literal once and refer to it by name, so every field that
+# shares a category also shares the same type object.
+Confidence: TypeAlias = Literal["high", "medium", "low"]
+Polarity: TypeAlias = Literal["positive", "negative", "neutral"]
+Category: TypeAlias = Literal["politics", "technology", "sports", "business", "other"]
 
 
 class ProductionQA(dspy.Signature):
@@ -112,16 +100,19 @@ class ProductionQA(dspy.Signature):
 
     This signature is designed for high-reliability QA systems.
     """
-    # Input with clear length expectations
-    question: str = dspy.InputField(
-        desc="User's question (10-500 characters, well-formed)"
-    )
-
     # Context with structure guidance
+    # Declared first: DSPy formats inputs in declaration order, so putting the
+    # large, often-repeated context ahead of the per-call question keeps a
+    # shared prompt prefix that provider-side prompt caches can reuse.
     context: str = dspy.InputField(
         desc="Retrieved context passages (1-5 paragraphs of relevant information)"
     )
 
+    # Input with clear length expectations
+    question: str = dspy.InputField(
+        desc="User's question (10-500 characters, well-formed)"
+    )
+
     # Output with strict format
     answer: str = dspy.OutputField(
         desc="Direct answer (20-150 words). Must be based on context. "
@@ -129,7 +120,7 @@ class ProductionQA(dspy.Signature):
     )
 
     # Confidence as constrained enum using Literal
-    confidence: Literal["high", "medium", "low"] = dspy.OutputField(
+    confidence: Confidence = dspy.OutputField(
         desc="Confidence level: "
              "high = direct evidence in context; "
              "medium = inferential from context; "
@@ -148,21 +139,13 @@ class ProductionQA(dspy.Signature):
 # - Length constraints specified
 # - Fallback behavior documented ("Insufficient information")
 # - Audit fields (evidence) for explainability
+# - Stable, long inputs (context) before volatile ones (question) for prompt caching
 
-print("ProductionQA Signature:")
-print(f"  Docstring: Comprehensive with requirements")
-print(f"  Input fields: question, context (with length/structure guidance)")
-print(f"  Output fields: answer, confidence (Literal enum), evidence")
-print(f"  Type hints: str + Literal (strict types)")
-print(f"  Special features: Audit trail, fallback behavior, constrained categories")
-print("\n🎯 Production systems use this for reliability and auditability")
 
 # =============================================================================
 # EXAMPLE 4: Classification Signature
 # =============================================================================
 
-print("\n[EXAMPLE 4] Classification Pattern\n")
-
 
 class EmailClassifier(dspy.Signature):
     """Classify emails as spam or legitimate.
@@ -193,18 +176,11 @@ class EmailClassifier(dspy.Signature):
 # - Reasoning field enables debugging
 # - Multiple inputs capture different aspects
 
-print("EmailClassifier Signature:")
-print(f"  Task: Binary classification")
-print(f"  Inputs: email_subject, email_body")
-print(f"  Outputs: classification (Literal), reasoning")
-print(f"  Key feature: Literal['spam', 'legitimate'] prevents invalid outputs")
 
 # =============================================================================
 # EXAMPLE 5: Multi-Output Structured Extraction
 # =============================================================================
 
-print("\n[EXAMPLE 5] Structured Extraction Pattern\n")
-
 
 class ArticleExtractor(dspy.Signature):
     """Extract structured information from news articles.
@@ -233,11 +209,11 @@ class ArticleExtractor(dspy.Signature):
         desc="Three-sentence summary of main points"
     )
 
-    category: Literal["politics", "technology", "sports", "business", "other"] = dspy.OutputField(
+    category: Category = dspy.OutputField(
         desc="Primary article category"
     )
 
-    sentiment: Literal["positive", "negative", "neutral"] = dspy.OutputField(
+    sentiment: Polarity = dspy.OutputField(
         desc="Overall article sentiment/tone"
     )
 
@@ -247,18 +223,19 @@ class ArticleExtractor(dspy.Signature):
 # - Each field has specific format/constraints
 # - Better than parsing unstructured output
 # - Enables downstream processing
+#
+# NOTE ON LONG TEXT INPUTS:
+# - A str input such as article_text is inserted into the prompt as-is;
+#   there is no per-call encoding step worth caching on the field type
+# - Heavy DSPy types (e.g. dspy.Image) already memoize their own formatting
+# - To avoid paying for the same document twice, reuse the prompt prefix
+#   (see ProductionQA field order) or cache whole LM calls instead
 
-print("ArticleExtractor Signature:")
-print(f"  Task: Extract 6 structured fields")
-print(f"  Inputs: article_text")
-print(f"  Outputs: title, author, date, summary, category, sentiment")
-print(f"  Key feature: Single LM call → structured data object")
 
 # =============================================================================
 # EXAMPLE 6: Comparison - Evolution of a Signature
 # =============================================================================
 
-print("\n[EXAMPLE 6] Signature Evolution: V1 → V2 → V3\n")
 
 # VERSION 1: Learning (official docs style)
 class SentimentV1(dspy.Signature):
@@ -267,11 +244,6 @@ class SentimentV1(dspy.Signature):
     sentiment = dspy.OutputField()
 
 
-print("SentimentV1 (Learning):")
-print("  ✅ Simple, easy to understand")
-print("  ❌ Vague output format")
-print("  ❌ No guidance on edge cases")
-
 # VERSION 2: Development (community style)
 class SentimentV2(dspy.Signature):
     """Classify text sentiment as positive, negative, or neutral."""
@@ -279,12 +251,6 @@ class SentimentV2(dspy.Signature):
     sentiment: str = dspy.OutputField(desc="Sentiment: positive, negative, or neutral")
 
 
-print("\nSentimentV2 (Development):")
-print("  ✅ Clear task definition")
-print("  ✅ Type hints added")
-print("  ✅ Field descriptions")
-print("  ❌ Still allows invalid outputs (str not constrained)")
-
 # VERSION 3: Production (enterprise style)
 class SentimentV3(dspy.Signature):
     """Classify sentiment with confidence assessment.
@@ -296,11 +262,11 @@ class SentimentV3(dspy.Signature):
         desc="Input text for sentiment analysis (10-1000 characters)"
     )
 
-    sentiment: Literal["positive", "negative", "neutral"] = dspy.OutputField(
+    sentiment: Polarity = dspy.OutputField(
         desc="Overall emotional tone classification"
     )
 
-    confidence: Literal["high", "medium", "low"] = dspy.OutputField(
+    confidence: Confidence = dspy.OutputField(
         desc="Classification confidence: high = clear indicators, "
              "medium = mixed signals, low = ambiguous"
     )
@@ -310,22 +276,43 @@ class SentimentV3(dspy.Signature):
     )
 
 
-print("\nSentimentV3 (Production):")
-print("  ✅ Constrained outputs (Literal types)")
-print("  ✅ Confidence tracking")
-print("  ✅ Explainability (key_phrases)")
-print("  ✅ Edge case handling (ambiguous → neutral)")
-print("  ✅ Length constraints specified")
+# =============================================================================
+# EXAMPLE 7: Building Signatures from a Compact Spec
+# =============================================================================
+
+# Every signature above has the same shape: a docstring plus a list of
+# named, typed fields split into inputs and outputs. When signatures are
+# generated from config (or share a convention such as field order), DSPy's
+# built-in dspy.make_signature builds the class from a dict of
+# {name: (type, field)} instead of a class body.
+
+TicketRouter = dspy.make_signature(
+    {
+        "ticket": (str, dspy.InputField(desc="Customer support ticket text (subject and body)")),
+        "team": (Literal["billing", "technical", "account", "other"],
+                 dspy.OutputField(desc="Team responsible for resolving the ticket")),
+        "confidence": (Confidence, dspy.OutputField(
+            desc="Routing confidence: high = explicit request, low = vague ticket")),
+    },
+    "Route a customer support ticket to the team that should handle it.",
+    "TicketRouter",
+)
+
+
+# WHEN TO USE make_signature:
+# - Signatures generated from config files or UI builders
+# - Many signatures sharing conventions (field order, shared descriptions)
+# - Hand-written classes remain clearer for one-off, reviewed signatures
+
 
 # =============================================================================
-# PATTERN COMPARISON SUMMARY
+# DEMO: Narrated walkthrough (runs only when executed as a script)
 # =============================================================================
 
-print("\n" + "=" * 80)
-print("PATTERN COMPARISON SUMMARY")
-print("=" * 80)
 
-print("""
+_BAR = "=" * 80
+
+_TABLE = """
 ┌────────────────┬─────────────────────┬──────────────────────┬──────────────────────┐
 │ Aspect         │ Official Docs       │ Community Projects   │ Production Systems   │
 ├────────────────┼─────────────────────┼──────────────────────┼──────────────────────┤
@@ -359,17 +346,9 @@ Production Pattern:
   ✓ Compliance/audit requirements
   ✓ When consistency is critical
   ✓ Enterprise deployments
-""")
-
-# =============================================================================
-# KEY TAKEAWAYS
-# =============================================================================
-
-print("=" * 80)
-print("KEY TAKEAWAYS")
-print("=" * 80)
+"""
 
-print("""
+_TAKEAWAYS = """
 1. SIGNATURES ARE CONTRACTS
    - Define what, not how
    - Separate specification from implementation
@@ -404,8 +383,105 @@ print("""
    - Docs optimize for learning
    - Production optimizes for reliability
    - Both are "correct" for different goals
-""")
+"""
+
 
-print("\n" + "=" * 80)
-print("Next: Try ../challenge/tasks.md to practice these patterns!")
-print("=" * 80)
+def _demo():
+    """Print the annotated walkthrough for every example signature."""
+    out = []
+
+    # Banner
+    out.append(_BAR)
+    out.append("DSPy Signatures: Annotated Examples")
+    out.append(_BAR)
+
+    # Example 1
+    out.append("\n[EXAMPLE 1] Official Docs Pattern: Minimal Signature\n")
+    out.append("BasicQA Signature:")
+    out.append(f"  Docstring: {BasicQA.__doc__}")
+    out.append("  Input fields: question")
+    out.append("  Output fields: answer")
+    out.append("  Type hints: None (implied str)")
+    out.append("\n✅ Official docs use this for simplicity and teaching")
+
+    # Example 2
+    out.append("\n[EXAMPLE 2] Community Pattern: With Descriptions\n")
+    out.append("DescriptiveQA Signature:")
+    out.append("  Docstring: Multi-line with constraints")
+    out.append("  Input fields: question, context (both with descriptions)")
+    out.append("  Output fields: answer (with format guidance)")
+    out.append("  Type hints: str (explicit)")
+    out.append("\n⚡ Community projects use this for better LM guidance")
+
+    # Example 3
+    out.append("\n[EXAMPLE 3] Production Pattern: Full Validation\n")
+    out.append("ProductionQA Signature:")
+    out.append("  Docstring: Comprehensive with requirements")
+    out.append("  Input fields: context, question (stable prefix first, with length/structure guidance)")
+    out.append("  Output fields: answer, confidence (Literal enum), evidence")
+    out.append("  Type hints: str + Literal (strict types)")
+    out.append("  Special features: Audit trail, fallback behavior, constrained categories")
+    out.append("\n🎯 Production systems use this for reliability and auditability")
+
+    # Example 4
+    out.append("\n[EXAMPLE 4] Classification Pattern\n")
+    out.append("EmailClassifier Signature:")
+    out.append("  Task: Binary classification")
+    out.append("  Inputs: email_subject, email_body")
+    out.append("  Outputs: classification (Literal), reasoning")
+    out.append("  Key feature: Literal['spam', 'legitimate'] prevents invalid outputs")
+
+    # Example 5
+    out.append("\n[EXAMPLE 5] Structured Extraction Pattern\n")
+    out.append("ArticleExtractor Signature:")
+    out.append("  Task: Extract 6 structured fields")
+    out.append("  Inputs: article_text")
+    out.append("  Outputs: title, author, date, summary, category, sentiment")
+    out.append("  Key feature: Single LM call → structured data object")
+
+    # Example 6
+    out.append("\n[EXAMPLE 6] Signature Evolution: V1 → V2 → V3\n")
+    out.append("SentimentV1 (Learning):")
+    out.append("  ✅ Simple, easy to understand")
+    out.append("  ❌ Vague output format")
+    out.append("  ❌ No guidance on edge cases")
+    out.append("\nSentimentV2 (Development):")
+    out.append("  ✅ Clear task definition")
+    out.append("  ✅ Type hints added")
+    out.append("  ✅ Field descriptions")
+    out.append("  ❌ Still allows invalid outputs (str not constrained)")
+    out.append("\nSentimentV3 (Production):")
+    out.append("  ✅ Constrained outputs (Literal types)")
+    out.append("  ✅ Confidence tracking")
+    out.append("  ✅ Explainability (key_phrases)")
+    out.append("  ✅ Edge case handling (ambiguous → neutral)")
+    out.append("  ✅ Length constraints specified")
+
+    # Example 7
+    out.append("\n[EXAMPLE 7] Signatures from a Compact Spec\n")
+    out.append("TicketRouter Signature (built with dspy.make_signature):")
+    out.append(f"  Docstring: {TicketRouter.__doc__}")
+    out.append(f"  Input fields: {', '.join(TicketRouter.input_fields)}")
+    out.append(f"  Output fields: {', '.join(TicketRouter.output_fields)}")
+    out.append("  Key feature: Same Signature class as hand-written, defined as data")
+
+    # Pattern comparison summary
+    out.append("\n" + _BAR)
+    out.append("PATTERN COMPARISON SUMMARY")
+    out.append(_BAR)
+    out.append(_TABLE)
+
+    # Key Takeaways
+    out.append(_BAR)
+    out.append("KEY TAKEAWAYS")
+    out.append(_BAR)
+    out.append(_TAKEAWAYS)
+    out.append("\n" + _BAR)
+    out.append("Next: Try ../challenge/tasks.md to practice these patterns!")
+    out.append(_BAR)
+
+    sys.stdout.write("\n".join(out) + "\n")
+
+
+if __name__ == "__main__":
+    _demo()
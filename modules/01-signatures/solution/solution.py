@@ -7,8 +7,44 @@ Study this code to understand best practices and compare with your solutions.
 All signatures here are fully runnable and follow DSPy best practices.
 """
 
+import functools
+import json
+import re
+import sys
+
 import dspy
-from typing import Literal, Optional
+from typing import Literal, TypeAlias, get_origin
+
+# =============================================================================
+# SHARED TYPES & FIELD DESCRIPTIONS
+# =============================================================================
+
+# Categorical types reused by more than one signature in this file. Level is
+# the generic high/medium/low scale, used for both urgency and confidence.
+Level: TypeAlias = Literal["high", "medium", "low"]
+Polarity: TypeAlias = Literal["positive", "negative", "neutral"]
+ReportType: TypeAlias = Literal["10-K", "10-Q", "8-K", "annual", "quarterly", "other"]
+RiskLevel: TypeAlias = Literal["low", "moderate", "high", "critical"]
+
+# Field descriptions shared by more than one signature, so related signatures
+# (EmailResponse V2/V3, the single-call and staged financial analyzers) always
+# send the LM identical wording. Only the strings are shared: DSPy stores
+# per-class metadata on each field, so field objects are never reused.
+FIELD_DESCS = {
+    "email": "Incoming email to respond to (subject and body)",
+    "report_text": "Report text or relevant sections",
+    "fiscal_period": "Fiscal period covered, e.g. 'Q3 2024' or 'FY 2023'",
+    "report_type": "Type of financial report being analyzed",
+    "focus_areas": "Comma-separated: revenue, expenses, cash_flow, debt, all",
+    "revenue": "Revenue with currency and period, or 'Not stated'",
+    "net_income": "Net profit/loss with currency, or 'Not stated'",
+    "cash_position": "Cash and equivalents with date, or 'Not stated'",
+    "debt_level": "Total debt or debt-to-equity, or 'Not disclosed'",
+    "red_flags": "Numbered concerns (declines, anomalies, missing disclosures, going concern), or 'None identified'",
+    "risk_level": "low = sound; moderate = manageable weaknesses; high = significant concerns; critical = going concern",
+    "evidence": "3-5 lines: '- [Metric]: \"exact quote\" (page X)'",
+    "missing_data": "Expected data not found, or 'All expected data present'",
+}
 
 # =============================================================================
 # TASK 1 SOLUTION: Basic Signature
@@ -48,7 +84,7 @@ class ProductReviewAnalyzer(dspy.Signature):
         desc="Customer review text (10-500 words)"
     )
 
-    sentiment: Literal["positive", "negative", "neutral"] = dspy.OutputField(
+    sentiment: Polarity = dspy.OutputField(
         desc="Overall sentiment: positive (mostly praise), negative (mostly criticism), neutral (mixed/factual)"
     )
     rating: str = dspy.OutputField(
@@ -87,6 +123,9 @@ class MeetingNotesExtractor(dspy.Signature):
 
     This signature supports both formal and casual meeting formats.
     """
+    # The transcript is the long, shared document (several extractions often
+    # run against the same meeting), so it stays first: DSPy formats inputs in
+    # declaration order and a stable prefix lets prompt caches reuse it.
     transcript: str = dspy.InputField(
         desc="Full meeting transcript or detailed notes (100-5000 words)"
     )
@@ -107,7 +146,7 @@ class MeetingNotesExtractor(dspy.Signature):
         desc="Next steps for the team (3-5 bullet points). "
              "Each bullet should be actionable and specific."
     )
-    confidence: Literal["high", "medium", "low"] = dspy.OutputField(
+    confidence: Level = dspy.OutputField(
         desc="Extraction confidence: "
              "high = clear, detailed transcript; "
              "medium = some ambiguity or missing context; "
@@ -121,6 +160,7 @@ class MeetingNotesExtractor(dspy.Signature):
 # - Specifies fallback behavior ("No formal decisions recorded")
 # - Confidence field enables quality assessment
 # - meeting_type provides context but isn't strictly required
+# - Long, shared input (transcript) declared first to maximize prompt-cache reuse
 # - Output formats clearly specified (numbered list, bullet points, etc.)
 
 
@@ -149,10 +189,11 @@ class EmailResponseV2(dspy.Signature):
     Match the tone of the original email and be concise.
     """
     email: str = dspy.InputField(
-        desc="Incoming email to respond to"
+        desc=FIELD_DESCS["email"]
     )
     context: str = dspy.InputField(
-        desc="Additional context or information to include in response"
+        desc="Additional context or information to include in response",
+        default="",
     )
 
     response: str = dspy.OutputField(
@@ -167,59 +208,73 @@ class EmailResponseV2(dspy.Signature):
 # - Type hints added
 # - Field descriptions provide guidance
 # - Multiple outputs for richer data
-# - Added context input for flexibility
+# - Added context input for flexibility (optional; see ElidingPredict)
 # USE WHEN: Team development, moderate complexity, need some control
 
 
+class ElidingPredict(dspy.Predict):
+    """``dspy.Predict`` that leaves empty optional inputs out of the prompt.
+
+    An optional input (one with a default) whose value is ``""`` or ``None``
+    is removed from the signature for that call, so the LM never sees an
+    empty ``context:`` section.
+    """
+
+    def _elide(self, kwargs):
+        signature = kwargs.pop("signature", self.signature)
+        for name, field in signature.input_fields.items():
+            if not field.is_required() and kwargs.get(name, field.default) in ("", None):
+                signature = signature.delete(name)
+                kwargs.pop(name, None)
+        return dict(kwargs, signature=signature)
+
+    def forward(self, **kwargs):
+        return super().forward(**self._elide(kwargs))
+
+    async def aforward(self, **kwargs):
+        return await super().aforward(**self._elide(kwargs))
+
+
 # VERSION 3: Production Pattern (Validated)
+# Docstring and descriptions are sent to the LM on every call, so they state
+# the contract, edge cases included, in as few words as possible.
 class EmailResponseV3(dspy.Signature):
-    """Generate professional email responses with quality controls.
-
-    Create responses that:
-    - Match the urgency and tone of the incoming email
-    - Are grammatically correct and professional
-    - Include all necessary information from context
-    - Are appropriately concise (no unnecessary verbosity)
-
-    Edge Cases:
-    - If email is unclear, ask clarifying questions in response
-    - If context is insufficient, note what information is missing
-    - If tone is difficult to determine, default to professional/formal
+    """Write a concise, professional reply to an email.
+
+    Match the sender's tone and urgency; use only facts from context.
+    Edge cases: ask clarifying questions if the email is unclear, list missing
+    information in flags, and default to a professional tone when unsure.
     """
     email: str = dspy.InputField(
-        desc="Incoming email to respond to (with subject and body)"
+        desc=FIELD_DESCS["email"]
     )
     context: str = dspy.InputField(
-        desc="Background information, facts, or data to incorporate into response"
+        desc="Background facts or data the reply must incorporate"
     )
     response_goal: str = dspy.InputField(
-        desc="Primary goal of response: answer_question, schedule_meeting, provide_update, decline_request, etc."
+        desc="Goal, e.g. answer_question, schedule_meeting, decline_request"
     )
 
     response: str = dspy.OutputField(
-        desc="Complete email response including greeting and signature. "
-             "Length: 150-400 words. Must be professional and address all points from original email."
+        desc="Full reply with greeting and signature, 150-400 words, addressing every point"
     )
     tone: Literal["formal", "professional", "friendly", "casual"] = dspy.OutputField(
-        desc="Tone used in response, matching the incoming email's tone"
+        desc="Tone used in the reply, matching the incoming email's tone"
     )
-    urgency: Literal["high", "medium", "low"] = dspy.OutputField(
-        desc="Response urgency level based on original email"
+    urgency: Level = dspy.OutputField(
+        desc="Urgency of the incoming email"
     )
-    confidence: Literal["high", "medium", "low"] = dspy.OutputField(
-        desc="Confidence in response quality: "
-             "high = all information available, clear request; "
-             "medium = some ambiguity; "
-             "low = insufficient context or unclear request"
+    confidence: Level = dspy.OutputField(
+        desc="high|medium|low by clarity of request and context"
     )
     flags: str = dspy.OutputField(
-        desc="Any issues or notes for human review. Use 'None' if no issues. "
-             "Example: 'Missing pricing information' or 'Legal review recommended'"
+        desc="Issues for human review (missing info, clarification needed), or 'None'"
     )
 
 
 # CHARACTERISTICS:
-# - Comprehensive docstring with edge cases
+# - Concise docstring with edge-case rules (prompt text is paid on every call)
+# - Edge cases also surfaced through flags/confidence outputs
 # - Three inputs for full context
 # - Five outputs for complete metadata
 # - Literal types constrain categorical outputs
@@ -228,6 +283,25 @@ class EmailResponseV3(dspy.Signature):
 # USE WHEN: Production systems, customer-facing, compliance requirements
 
 
+class JSONPredict(ElidingPredict):
+    """``ElidingPredict`` that has the LM answer with one JSON object.
+
+    ``dspy.JSONAdapter`` requests structured output from providers that
+    support it, so wide signatures skip the ``[[ ## field ## ]]`` markers and
+    their outputs come back as schema-checked JSON. ``Literal`` outputs become
+    ``enum`` entries in that schema, which servers with constrained decoding
+    (OpenAI strict mode, vLLM guided decoding) enforce token by token.
+    """
+
+    def forward(self, **kwargs):
+        with dspy.context(adapter=dspy.JSONAdapter()):
+            return super().forward(**kwargs)
+
+    async def aforward(self, **kwargs):
+        with dspy.context(adapter=dspy.JSONAdapter()):
+            return await super().aforward(**kwargs)
+
+
 # EVOLUTION SUMMARY:
 # V1 → V2: Added type hints, field descriptions, multiple outputs
 # V2 → V3: Added validation, edge case handling, metadata, constraints
@@ -243,95 +317,67 @@ class EmailResponseV3(dspy.Signature):
 class FinancialReportAnalyzer(dspy.Signature):
     """Analyze financial reports for compliance and risk assessment.
 
-    Extract structured financial data and identify potential red flags from
-    quarterly and annual financial reports. This signature is designed for
-    compliance teams and auditors.
-
-    Requirements:
-    - Extract only explicitly stated metrics (no speculation)
-    - Cite exact locations in report for all extracted data
-    - Flag any anomalies or concerning patterns
-    - Assess confidence based on report clarity and completeness
-
-    Compliance Notes:
-    - All metrics must be traceable to source document
-    - Uncertainty must be explicitly communicated
-    - Red flags should reference specific regulatory concerns
-    - Evidence field is required for audit trail
-
-    Supported Report Types: 10-K, 10-Q, 8-K, Annual Report, Quarterly Report
+    Compliance requirements: extract only explicitly stated metrics (no
+    speculation), trace every finding to an exact quote (evidence is the audit
+    trail), state uncertainty via confidence and missing_data, and flag
+    regulatory concerns. Supports 10-K, 10-Q, 8-K, annual and quarterly reports.
     """
     report_text: str = dspy.InputField(
-        desc="Full text of financial report or relevant sections (500-10000 words)"
+        desc=FIELD_DESCS["report_text"]
     )
-    report_type: Literal["10-K", "10-Q", "8-K", "annual", "quarterly", "other"] = dspy.InputField(
-        desc="Type of financial report being analyzed"
+    report_type: ReportType = dspy.InputField(
+        desc=FIELD_DESCS["report_type"]
     )
     fiscal_period: str = dspy.InputField(
-        desc="Fiscal period covered (e.g., 'Q3 2024', 'FY 2023')"
+        desc=FIELD_DESCS["fiscal_period"]
     )
     focus_areas: str = dspy.InputField(
-        desc="Specific areas to focus on: revenue, expenses, cash_flow, debt, all (comma-separated)"
+        desc=FIELD_DESCS["focus_areas"]
     )
 
     # Key Metrics
     revenue: str = dspy.OutputField(
-        desc="Revenue figure with currency and period. Use 'Not stated' if not found. "
-             "Example: '$45.2M for Q3 2024'"
+        desc=FIELD_DESCS["revenue"]
     )
     net_income: str = dspy.OutputField(
-        desc="Net income/loss with currency. Example: '$12.5M profit' or '$3.2M loss'"
+        desc=FIELD_DESCS["net_income"]
     )
     cash_position: str = dspy.OutputField(
-        desc="Cash and cash equivalents. Example: '$78.3M as of Sep 30, 2024'"
+        desc=FIELD_DESCS["cash_position"]
     )
     debt_level: str = dspy.OutputField(
-        desc="Total debt or debt-to-equity ratio if stated. Use 'Not disclosed' if absent."
+        desc=FIELD_DESCS["debt_level"]
     )
 
     # Risk Assessment
     red_flags: str = dspy.OutputField(
-        desc="Identified red flags or concerns as numbered list. "
-             "Include: declining metrics, unusual patterns, missing disclosures, going concern warnings. "
-             "Use 'None identified' if no concerns found. "
-             "Example: '1. Revenue down 15% YoY, 2. Debt increased 40% QoQ'"
+        desc=FIELD_DESCS["red_flags"]
     )
-    risk_level: Literal["low", "moderate", "high", "critical"] = dspy.OutputField(
-        desc="Overall risk assessment: "
-             "low = strong financials, no concerns; "
-             "moderate = some weaknesses but manageable; "
-             "high = significant concerns requiring attention; "
-             "critical = going concern or severe issues"
+    risk_level: RiskLevel = dspy.OutputField(
+        desc=FIELD_DESCS["risk_level"]
     )
 
     # Quality & Audit
-    confidence: Literal["high", "medium", "low"] = dspy.OutputField(
-        desc="Confidence in analysis: "
-             "high = complete report, clear metrics, detailed disclosures; "
-             "medium = some missing data or ambiguity; "
-             "low = incomplete report or unclear presentation"
+    confidence: Level = dspy.OutputField(
+        desc="high|medium|low based on report completeness"
     )
     evidence: str = dspy.OutputField(
-        desc="Direct quotes from report supporting key findings. "
-             "Format: '- [Metric]: \"exact quote from report\" (page X)'. "
-             "Provide 3-5 key quotes for audit trail."
+        desc=FIELD_DESCS["evidence"]
     )
     missing_data: str = dspy.OutputField(
-        desc="List of expected data not found in report. "
-             "Use 'All expected data present' if complete. "
-             "Example: 'Cash flow statement, segment breakdowns'"
+        desc=FIELD_DESCS["missing_data"]
     )
 
 
 # EXPLANATION:
-# - Comprehensive compliance-focused docstring
+# - Compliance-focused docstring: requirements in one short paragraph
 # - Four inputs provide full context (report, type, period, focus)
 # - Nine outputs cover metrics, risk, and audit requirements
 # - Literal types for categorical data (report_type, risk_level)
 # - Evidence field provides audit trail
 # - missing_data field tracks gaps
 # - All outputs specify fallback values ("Not stated", "None identified")
-# - Format examples in every field description
+# - Terse descriptions: every prompt token is paid on each call
 # - Confidence tracking for downstream risk management
 
 
@@ -341,20 +387,321 @@ class FinancialReportAnalyzer(dspy.Signature):
 # 3. Structure: Multiple focused outputs vs. one blob
 # 4. Constraints: Literal types prevent invalid categories
 # 5. Flexibility: Handles multiple report types
-# 6. Documentation: Compliance requirements in docstring
+# 6. Documentation: Compliance requirements in docstring, stated concisely
+
+
+# =============================================================================
+# BONUS EXTENSION: Staged Financial Analysis
+# =============================================================================
+
+# FinancialReportAnalyzer reads the whole report and reasons about risk in the
+# same call. Splitting it in two keeps the long report in a pure extraction
+# step; the risk assessment then runs on a few hundred tokens of metrics.
+
+
+class FinancialMetricsExtractor(dspy.Signature):
+    """Extract stated financial metrics from a report, citing exact quotes; never speculate."""
+    report_text: str = dspy.InputField(
+        desc=FIELD_DESCS["report_text"]
+    )
+    report_type: ReportType = dspy.InputField(
+        desc=FIELD_DESCS["report_type"]
+    )
+    fiscal_period: str = dspy.InputField(
+        desc=FIELD_DESCS["fiscal_period"]
+    )
+
+    revenue: str = dspy.OutputField(
+        desc=FIELD_DESCS["revenue"]
+    )
+    net_income: str = dspy.OutputField(
+        desc=FIELD_DESCS["net_income"]
+    )
+    cash_position: str = dspy.OutputField(
+        desc=FIELD_DESCS["cash_position"]
+    )
+    debt_level: str = dspy.OutputField(
+        desc=FIELD_DESCS["debt_level"]
+    )
+    evidence: str = dspy.OutputField(
+        desc=FIELD_DESCS["evidence"]
+    )
+    missing_data: str = dspy.OutputField(
+        desc=FIELD_DESCS["missing_data"]
+    )
+
+
+class FinancialRiskAssessor(dspy.Signature):
+    """Assess compliance risk from extracted financial metrics."""
+    metrics_json: str = dspy.InputField(
+        desc="JSON of extracted metrics, evidence and missing data"
+    )
+    focus_areas: str = dspy.InputField(
+        desc=FIELD_DESCS["focus_areas"]
+    )
+
+    red_flags: str = dspy.OutputField(
+        desc=FIELD_DESCS["red_flags"]
+    )
+    risk_level: RiskLevel = dspy.OutputField(
+        desc=FIELD_DESCS["risk_level"]
+    )
+    confidence: Level = dspy.OutputField(
+        desc="high|medium|low based on completeness of the metrics"
+    )
+
+
+# Reports can run to 10000+ words. Before extraction, keep only as much text
+# as fits a token budget, preferring sections whose heading matches a focus area.
+_HEADING = re.compile(r"\n(?=#+\s)")
+
+
+@functools.cache
+def _token_encoder():
+    """Return a tiktoken encoder, or ``None`` if tiktoken or its data is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except (ImportError, OSError, ValueError):  # not installed, or encoding data unavailable
+        return None
+
+
+def _count_tokens(text):
+    encoder = _token_encoder()
+    if encoder is None:
+        return len(text.split()) * 4 // 3  # ~0.75 words per token
+    return len(encoder.encode(text))
+
+
+def _truncate_tokens(text, max_tokens):
+    encoder = _token_encoder()
+    if encoder is None:
+        return " ".join(text.split()[: max_tokens * 3 // 4])
+    return encoder.decode(encoder.encode(text)[:max_tokens])
+
+
+def prepare_report(report_text, focus_areas, max_tokens=4096):
+    """Trim ``report_text`` to about ``max_tokens`` tokens for extraction.
+
+    Short reports are returned unchanged. Longer ones are split on markdown
+    headings; sections whose heading mentions a focus area are kept first
+    (truncated to the remaining budget if too long), then the remaining
+    sections in document order, until the budget is spent. Kept sections stay
+    in their original order.
+    """
+    if _count_tokens(report_text) <= max_tokens:
+        return report_text
+
+    keywords = [
+        area.strip().replace("_", " ").lower()
+        for area in focus_areas.split(",")
+        if area.strip() and area.strip() != "all"
+    ]
+    sections = _HEADING.split(report_text)
+
+    def matches_focus(section):
+        heading = section.lstrip().split("\n", 1)[0].lower()
+        return any(keyword in heading for keyword in keywords)
+
+    ranked = sorted(range(len(sections)), key=lambda i: not matches_focus(sections[i]))
+    kept, budget = set(), max_tokens
+    for i in ranked:
+        cost = _count_tokens(sections[i])
+        if cost <= budget:
+            kept.add(i)
+            budget -= cost
+        elif budget > 0 and matches_focus(sections[i]):
+            sections[i] = _truncate_tokens(sections[i], budget)
+            kept.add(i)
+            budget = 0
+    if not kept:
+        return _truncate_tokens(sections[ranked[0]], max_tokens)
+    return "\n".join(sections[i] for i in sorted(kept))
+
+
+class StagedFinancialAnalyzer(dspy.Module):
+    """Extract metrics from the report, then assess risk from the metrics alone."""
+
+    def __init__(self, max_report_tokens=4096):
+        super().__init__()
+        self.max_report_tokens = max_report_tokens
+        self.extract = JSONPredict(FinancialMetricsExtractor)
+        self.assess = JSONPredict(FinancialRiskAssessor)
+        # Both stages run on the model MODEL_ROUTES assigns them
+        self.extract.lm = routed_lm(FinancialMetricsExtractor)
+        self.assess.lm = routed_lm(FinancialRiskAssessor)
+
+    def forward(self, report_text, report_type, fiscal_period, focus_areas):
+        metrics = self.extract(
+            report_text=prepare_report(report_text, focus_areas, self.max_report_tokens),
+            report_type=report_type,
+            fiscal_period=fiscal_period,
+        )
+        metrics_json = json.dumps(
+            {name: metrics[name] for name in FinancialMetricsExtractor.output_fields}
+        )
+        assessment = self.assess(metrics_json=metrics_json, focus_areas=focus_areas)
+        return dspy.Prediction(**metrics.toDict(), **assessment.toDict())
+
+
+# WHY STAGE IT:
+# - The long report is read once, by a step that only extracts
+# - Risk reasoning runs on a short JSON summary instead of the full report
+# - prepare_report() bounds the extraction prompt on very long reports
+# - Same outputs as FinancialReportAnalyzer, two smaller prompts
+# - Trade-off: two LM calls, and the assessor only sees what was extracted
+
+
+# =============================================================================
+# BULK EXTENSION: Fused Document Analysis
+# =============================================================================
+
+# When one document needs a title, review-style sentiment and meeting-style
+# action items, three separate signatures send (and pay for) the same
+# document three times. A fused signature reads it once and fills every
+# output in a single call.
+
+
+class MultiAnalyzer(dspy.Signature):
+    """Analyze one document for a blog title, review sentiment and meeting follow-ups."""
+    document: str = dspy.InputField(
+        desc="Document to analyze"
+    )
+
+    blog_title: str = dspy.OutputField(
+        desc="Engaging blog post title for the document"
+    )
+    review_sentiment: Polarity = dspy.OutputField(
+        desc="Overall sentiment: positive (mostly praise), negative (mostly criticism), neutral (mixed/factual)"
+    )
+    review_rating: str = dspy.OutputField(
+        desc="Predicted star rating (1-5 stars) based on the sentiment"
+    )
+    review_key_points: str = dspy.OutputField(
+        desc="Comma-separated list of 3-5 main points"
+    )
+    meeting_decisions: str = dspy.OutputField(
+        desc="Numbered decisions, or 'No formal decisions recorded'"
+    )
+    meeting_action_items: str = dspy.OutputField(
+        desc="Lines of '- [Owner] Action', owner '[Unassigned]' if unknown"
+    )
+    meeting_next_steps: str = dspy.OutputField(
+        desc="3-5 actionable, specific next steps as bullet points"
+    )
+    confidence: Level = dspy.OutputField(
+        desc="high|medium|low based on how clearly the document supports the outputs"
+    )
+
+
+def analyze_all(document):
+    """Run ``MultiAnalyzer`` once and return its outputs as a plain dict."""
+    return cached_predict(MultiAnalyzer)(document=document).toDict()
+
+
+# WHY FUSE:
+# - The document is read once instead of once per signature
+# - One round trip instead of three
+# - Trade-off: more outputs per call (see Pitfall 4 in the tasks); keep the
+#   single-purpose signatures for one-off use
 
 
 # =============================================================================
 # TESTING & DEMONSTRATION
 # =============================================================================
 
+
+# Model routing: simple signatures (titles, sentiment, V1/V2 emails) run on the
+# small default model; only the signatures that need careful reasoning over
+# long or high-stakes input are routed to the large one.
+SMALL_MODEL = "openai/gpt-4o-mini"
+LARGE_MODEL = "openai/gpt-4o"
+MODEL_ROUTES = {
+    EmailResponseV3: LARGE_MODEL,
+    FinancialReportAnalyzer: LARGE_MODEL,
+    FinancialMetricsExtractor: LARGE_MODEL,
+    FinancialRiskAssessor: LARGE_MODEL,
+}
+# Extra dspy.LM arguments for routed models, e.g. api_base/api_key to send
+# them to a self-hosted server (see the live test section below).
+ROUTED_LM_KWARGS = {"max_tokens": 2000}
+
+# Signatures with at least this many outputs, or with any Literal output, are
+# answered as JSON.
+_JSON_MIN_OUTPUTS = 5
+
+
+def _has_literal_output(sig_class):
+    return any(get_origin(field.annotation) is Literal for field in sig_class.output_fields.values())
+
+
+def _has_optional_input(sig_class):
+    return any(not field.is_required() for field in sig_class.input_fields.values())
+
+
+@functools.cache
+def cached_predict(sig_class):
+    """Return one shared predictor per signature class.
+
+    Wide signatures and those with ``Literal`` outputs get a ``JSONPredict``,
+    so their categories are enforced by the output schema. Of the rest, those
+    with optional inputs get an ``ElidingPredict`` and the others use plain
+    ``dspy.Predict``. ``JSONPredict`` elides empty optional inputs as well.
+    Response caching is already built into DSPy: identical requests are served
+    from its memory/disk cache (see ``dspy.configure_cache``) without calling
+    the LM again, so reusing the predictor is all that is needed here.
+    """
+    if len(sig_class.output_fields) >= _JSON_MIN_OUTPUTS or _has_literal_output(sig_class):
+        return JSONPredict(sig_class)
+    if _has_optional_input(sig_class):
+        return ElidingPredict(sig_class)
+    return dspy.Predict(sig_class)
+
+
+def routed_lm(sig_class):
+    """Return the LM ``MODEL_ROUTES`` picks for a signature (``SMALL_MODEL`` by default).
+
+    Built on each call from the current routes and ``ROUTED_LM_KWARGS``, so
+    pointing those at another server takes effect without a restart.
+    """
+    return dspy.LM(MODEL_ROUTES.get(sig_class, SMALL_MODEL), **ROUTED_LM_KWARGS)
+
+
+def predict_routed(sig_class, **inputs):
+    """Run a signature on its routed model instead of the globally configured LM."""
+    with dspy.context(lm=routed_lm(sig_class)):
+        return cached_predict(sig_class)(**inputs)
+
+
+def run_batch(sig_class, batch, num_threads=8):
+    """Run one signature over a list of input dicts concurrently.
+
+    Requests are submitted together, so a server with continuous batching
+    (e.g. vLLM) can schedule them on the GPU at once. Results keep the order
+    of ``batch``. Like ``predict_routed``, the batch runs on the model
+    ``MODEL_ROUTES`` assigns to ``sig_class``.
+    """
+    predictor = cached_predict(sig_class)
+    parallel = dspy.Parallel(num_threads=num_threads, disable_progress_bar=True)
+    with dspy.context(lm=routed_lm(sig_class)):
+        return parallel([(predictor, inputs) for inputs in batch])
+
+
+@functools.cache
+def _signature_summary(sig_class):
+    """Return ``(doc_preview, n_inputs, n_outputs)`` for a signature, computed once per class."""
+    doc_preview = (sig_class.__doc__ or "")[:100]
+    return doc_preview, len(sig_class.input_fields), len(sig_class.output_fields)
+
+
 if __name__ == "__main__":
-    print("=" * 80)
-    print("DSPy Signatures - Complete Solutions")
-    print("=" * 80)
+    out = []
+    out.append("=" * 80)
+    out.append("DSPy Signatures - Complete Solutions")
+    out.append("=" * 80)
 
     # Display signature information without requiring LM
-    signatures = [
+    signatures = (
         ("Task 1: Blog Title Generator", BlogTitleGenerator),
         ("Task 2: Product Review Analyzer", ProductReviewAnalyzer),
         ("Task 3: Meeting Notes Extractor", MeetingNotesExtractor),
@@ -362,26 +709,24 @@ if __name__ == "__main__":
         ("Task 4 V2: Email Response (Descriptive)", EmailResponseV2),
         ("Task 4 V3: Email Response (Production)", EmailResponseV3),
         ("Bonus: Financial Report Analyzer", FinancialReportAnalyzer),
-    ]
+        ("Bonus Stage 1: Financial Metrics Extractor", FinancialMetricsExtractor),
+        ("Bonus Stage 2: Financial Risk Assessor", FinancialRiskAssessor),
+        ("Bulk: Fused Multi-Analyzer", MultiAnalyzer),
+    )
 
     for name, sig_class in signatures:
-        print(f"\n{name}")
-        print("-" * 40)
-        print(f"Docstring: {sig_class.__doc__[:100]}...")
-
-        # Count fields
-        input_fields = [f for f in sig_class.__annotations__ if hasattr(sig_class, f) and
-                       isinstance(getattr(sig_class, f), dspy.InputField)]
-        output_fields = [f for f in sig_class.__annotations__ if hasattr(sig_class, f) and
-                        isinstance(getattr(sig_class, f), dspy.OutputField)]
-
-        print(f"Inputs: {len(input_fields)}")
-        print(f"Outputs: {len(output_fields)}")
-
-    print("\n" + "=" * 80)
-    print("Pattern Evolution Comparison")
-    print("=" * 80)
-    print("""
+        out.append(f"\n{name}")
+        out.append("-" * 40)
+        doc_preview, n_inputs, n_outputs = _signature_summary(sig_class)
+
+        out.append(f"Docstring: {doc_preview}...")
+        out.append(f"Inputs: {n_inputs}")
+        out.append(f"Outputs: {n_outputs}")
+
+    out.append("\n" + "=" * 80)
+    out.append("Pattern Evolution Comparison")
+    out.append("=" * 80)
+    out.append("""
 EmailResponse Evolution:
 
 V1 (Official Docs):
@@ -389,49 +734,84 @@ V1 (Official Docs):
   - No type hints
   - Minimal docstring
   - ~5 lines of code
+  - Model: small (gpt-4o-mini)
   → Use for: Learning, prototyping
 
 V2 (Community):
   - 2 inputs, 2 outputs
   - Type hints added
   - Field descriptions
+  - Optional context, elided from the prompt when empty (ElidingPredict)
   - ~15 lines of code
+  - Model: small (gpt-4o-mini)
   → Use for: Development, team projects
 
 V3 (Production):
   - 3 inputs, 5 outputs
   - Literal types for validation
-  - Comprehensive docstring with edge cases
-  - ~40 lines of code
+  - Concise docstring with edge-case rules
+  - ~30 lines of code
+  - Model: large (gpt-4o), via predict_routed() and MODEL_ROUTES
   → Use for: Production, compliance, customer-facing
 
+Model Routing (cost vs. capability):
+  - Small model: titles, review sentiment, V1/V2 emails, fused analysis
+  - Large model: V3 emails, financial analysis (single-call and staged)
+
 Key Insight: Start with V1, evolve to V3 as requirements clarify.
     """)
 
-    print("=" * 80)
-    print("\nTo test with actual LM calls, uncomment the testing section below")
-    print("and configure your LM provider.")
-    print("=" * 80)
+    out.append("=" * 80)
+    out.append("\nTo test with actual LM calls, uncomment the testing section below")
+    out.append("and configure your LM provider.")
+    out.append("=" * 80)
+    sys.stdout.write("\n".join(out) + "\n")
 
     # UNCOMMENT TO TEST WITH REAL LM
     # import os
-    # lm = dspy.LM("openai/gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY"))
+    # # max_tokens bounds the length of every generated answer
+    # lm = dspy.LM(SMALL_MODEL, api_key=os.getenv("OPENAI_API_KEY"), max_tokens=2000)
+    # # Self-hosted alternative: any OpenAI-compatible server works, e.g. vLLM
+    # # started with --enable-prefix-caching, which batches concurrent requests:
+    # # lm = dspy.LM("openai/meta-llama/Llama-3.1-8B-Instruct",
+    # #              api_base="http://localhost:8000/v1", api_key="none")
+    # # and send the routed models (predict_routed, run_batch) there as well:
+    # # SMALL_MODEL = "openai/meta-llama/Llama-3.1-8B-Instruct"
+    # # MODEL_ROUTES.update(dict.fromkeys(MODEL_ROUTES, "openai/meta-llama/Llama-3.1-70B-Instruct"))
+    # # ROUTED_LM_KWARGS.update(api_base="http://localhost:8000/v1", api_key="none")
     # dspy.configure(lm=lm)
+    # # Repeat runs with identical inputs are answered from DSPy's response
+    # # cache (memory + ~/.dspy_cache on disk); tune it with:
+    # # dspy.configure_cache(enable_disk_cache=True, enable_memory_cache=True)
+    #
+    # # Run both live tests concurrently: the calls are independent, so
+    # # total wall time is bounded by the slowest call, not their sum.
+    # print("\n[Live Test: Blog Title Generator + Product Review Analyzer]")
+    # title_inputs = {"topic": "machine learning in climate science"}
+    # review_inputs = {
+    #     "product_name": "Bluetooth Speaker",
+    #     "review_text": "Amazing sound quality and battery lasts forever. A bit pricey but worth it.",
+    # }
+    # title_result, review_result = dspy.Parallel(num_threads=2)([
+    #     (cached_predict(BlogTitleGenerator), title_inputs),
+    #     (cached_predict(ProductReviewAnalyzer), review_inputs),
+    # ])
+    #
+    # print(f"Topic: {title_inputs['topic']}")
+    # print(f"Generated Title: {title_result.title}")
     #
-    # # Test Blog Title Generator
-    # print("\n[Live Test: Blog Title Generator]")
-    # predictor = dspy.Predict(BlogTitleGenerator)
-    # result = predictor(topic="machine learning in climate science")
-    # print(f"Topic: machine learning in climate science")
-    # print(f"Generated Title: {result.title}")
+    # print(f"Sentiment: {review_result.sentiment}")
+    # print(f"Rating: {review_result.rating}")
+    # print(f"Key Points: {review_result.key_points}")
     #
-    # # Test Product Review Analyzer
-    # print("\n[Live Test: Product Review Analyzer]")
-    # predictor = dspy.Predict(ProductReviewAnalyzer)
-    # result = predictor(
-    #     product_name="Bluetooth Speaker",
-    #     review_text="Amazing sound quality and battery lasts forever. A bit pricey but worth it."
+    # # predict_routed() runs EmailResponseV3 on LARGE_MODEL
+    # # (see MODEL_ROUTES) while the calls above use the small default LM
+    # print("\n[Live Test: Email Response V3 (large model)]")
+    # result = predict_routed(
+    #     EmailResponseV3,
+    #     email="Subject: Invoice 1042\n\nHi, our invoice seems to be charged twice. Can you check?",
+    #     context="Invoice 1042 was charged once; a pending authorization expires in 3 days.",
+    #     response_goal="answer_question",
     # )
-    # print(f"Sentiment: {result.sentiment}")
-    # print(f"Rating: {result.rating}")
-    # print(f"Key Points: {result.key_points}")
+    # print(f"Tone: {result.tone}, Urgency: {result.urgency}")
+    # print(f"Response: {result.response}")